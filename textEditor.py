@@ -1,28 +1,49 @@
 # editor.py
 import os
 import re
+import html
 import json
 import time
+import queue
 import hashlib
+import threading
 import traceback
+from bisect import bisect_left
+from collections import OrderedDict
+from functools import lru_cache
+from itertools import groupby
 from pathlib import Path
 
 import tkinter as tk
 from tkinter import ttk, filedialog, messagebox, simpledialog
 from tkinter import font as tkfont
 
-# Optional: PDF export (reportlab)
 try:
-    from reportlab.pdfgen import canvas as rl_canvas
-    from reportlab.lib.pagesizes import letter
-    REPORTLAB_OK = True
-except Exception:
-    REPORTLAB_OK = False
+    import orjson
+except ImportError:
+    orjson = None
 
 
 APP_NAME = "Simple Text Editor++"
 DEFAULT_AUTOSAVE_SECONDS = 15
 MAX_RECENT = 10
+ROPE_LEAF_SIZE = 4096
+BRACKET_SCAN_CHARS = 2048
+WRITE_CHUNK = 1 << 16
+NUMPY_MIN_LINES = 20000  # switch minimap stats to NumPy arrays past this many lines
+FIND_CACHE_SIZE = 64
+REPLACE_REGION_MAX = 256  # Replace All edits hits in place up to this many, else swaps the buffer
+STATUS_DELAY_MS = 30
+FONT_SIZES = tuple(range(8, 29))
+LAZY_STATS_LINES = 1000  # bigger edits leave minimap stats to be measured on demand
+
+# Redraw flags, coalesced into one idle callback per Document
+REDRAW_LINE_NUMS = 1
+REDRAW_BRACKETS = 2   # current line + bracket match
+REDRAW_SYNTAX = 4     # whitespace + syntax tags on every visible line
+REDRAW_MINIMAP = 8
+REDRAW_EDITED = 16    # re-tag only lines edited since the last pass
+REDRAW_ALL = REDRAW_LINE_NUMS | REDRAW_BRACKETS | REDRAW_SYNTAX | REDRAW_MINIMAP
 
 
 PY_KEYWORDS = set("""
@@ -30,6 +51,13 @@ False None True and as assert break class continue def del elif else except fina
 lambda nonlocal not or pass raise return try while with yield
 """.split())
 
+# One pass per line: comment | string | identifier (keyword check done by caller)
+TOK_RE = re.compile(r"(?P<com>#[^\n]*)|(?P<str>\"[^\"\n]*\"|'[^'\n]*')|(?P<kw>\b[A-Za-z_]\w*\b)")
+WS_TAB = re.compile(r"\t")
+WS_SP = re.compile(r" +")
+SYN_TAGS = {"com": "syn_com", "str": "syn_str", "kw": "syn_kw"}
+HL_TAGS = ("ws_space", "ws_tab", "ws_eol", *SYN_TAGS.values())
+
 
 def safe_read_text(path: str) -> str:
     try:
@@ -38,30 +66,448 @@ def safe_read_text(path: str) -> str:
         return Path(path).read_text(errors="ignore")
 
 
-def safe_write_text(path: str, text: str) -> None:
-    Path(path).write_text(text, encoding="utf-8")
+def safe_write_text(path: str, text) -> None:
+    """Write a str (or a Rope, leaf by leaf) without building one big encoded copy."""
+    if isinstance(text, Rope):
+        chunks = text.leaves()
+    else:
+        chunks = (text[i:i + WRITE_CHUNK] for i in range(0, len(text), WRITE_CHUNK))
+    with open(path, "w", encoding="utf-8", buffering=WRITE_CHUNK) as f:
+        for chunk in chunks:
+            f.write(chunk)
+
+
+_numpy = None
+
+
+def load_numpy():
+    """NumPy if installed (imported on first use), else None."""
+    global _numpy
+    if _numpy is None:
+        try:
+            import numpy
+            _numpy = numpy
+        except ImportError:
+            _numpy = False
+    return _numpy or None
+
+
+def json_dumps(obj) -> bytes:
+    """Compact UTF-8 JSON; orjson when installed, stdlib json otherwise."""
+    if orjson is not None:
+        try:
+            return orjson.dumps(obj)
+        except TypeError:
+            pass  # e.g. lone surrogates from Tk, which only stdlib json will escape
+    return json.dumps(obj, separators=(",", ":")).encode("utf-8")
+
+
+def json_loads(data: bytes):
+    if orjson is not None:
+        try:
+            return orjson.loads(data)
+        except orjson.JSONDecodeError:
+            pass  # e.g. escaped lone surrogates from json_dumps' stdlib fallback
+    return json.loads(data)
+
+
+_re2 = None
+
+
+def load_re2():
+    """re2 (linear-time matcher) if installed (imported on first use), else None."""
+    global _re2
+    if _re2 is None:
+        try:
+            import re2
+            _re2 = re2
+        except ImportError:
+            _re2 = False
+    return _re2 or None
+
+
+@lru_cache(maxsize=256)
+def abspath(path: str) -> str:
+    return os.path.abspath(path)
+
+
+def content_hash(s: str) -> str:
+    # Equality-only fingerprint (dirty check, autosave name): 64 bits is plenty
+    return hashlib.blake2b(s.encode("utf-8", errors="ignore"), digest_size=8).hexdigest()
+
+
+def offset_indices(text: str, offsets):
+    """Tk "line.col" indices for ascending char offsets into text, in one forward sweep."""
+    out = []
+    line, line_start, prev = 1, 0, 0
+    for off in offsets:
+        n = text.count("\n", prev, off)
+        if n:
+            line += n
+            line_start = text.rfind("\n", prev, off) + 1
+        out.append(f"{line}.{off - line_start}")
+        prev = off
+    return out
+
+
+def full_hash(chunks) -> bytes:
+    """Digest of a str or an iterable of str chunks (e.g. Rope.leaves()), fed piece by piece."""
+    h = hashlib.blake2b(digest_size=16)
+    for chunk in ((chunks,) if isinstance(chunks, str) else chunks):
+        h.update(chunk.encode("utf-8", errors="surrogatepass"))
+    return h.digest()
+
+
+class _RopeLeaf:
+    __slots__ = ("text", "length", "newlines", "depth")
+
+    def __init__(self, text: str):
+        self.text = text
+        self.length = len(text)
+        self.newlines = text.count("\n")
+        self.depth = 0
+
+
+class _RopeNode:
+    __slots__ = ("left", "right", "length", "newlines", "depth")
+
+    def __init__(self, left, right):
+        self.left = left
+        self.right = right
+        self.length = left.length + right.length
+        self.newlines = left.newlines + right.newlines
+        self.depth = max(left.depth, right.depth) + 1
+
+
+_ROPE_EMPTY = _RopeLeaf("")
+
+
+class Rope:
+    """
+    Balanced tree of ~4 KB string leaves:
+      - Nodes cache their length and newline count
+      - insert / delete / line lookups walk one root-to-leaf path
+    """
+    def __init__(self, text: str = ""):
+        self.root = self._build([text[i:i + ROPE_LEAF_SIZE] for i in range(0, len(text), ROPE_LEAF_SIZE)])
+
+    def __len__(self):
+        return self.root.length
+
+    # ---------- Tree helpers ----------
+    @staticmethod
+    def _build(chunks):
+        nodes = [_RopeLeaf(c) for c in chunks if c]
+        if not nodes:
+            return _ROPE_EMPTY
+        while len(nodes) > 1:
+            paired = [_RopeNode(nodes[i], nodes[i + 1]) for i in range(0, len(nodes) - 1, 2)]
+            if len(nodes) % 2:
+                paired.append(nodes[-1])
+            nodes = paired
+        return nodes[0]
+
+    @staticmethod
+    def _concat(a, b):
+        if not a.length:
+            return b
+        if not b.length:
+            return a
+        # Merge small neighbouring leaves so typing doesn't fragment the tree
+        if isinstance(b, _RopeLeaf):
+            if isinstance(a, _RopeLeaf):
+                if a.length + b.length <= ROPE_LEAF_SIZE:
+                    return _RopeLeaf(a.text + b.text)
+            elif isinstance(a.right, _RopeLeaf) and a.right.length + b.length <= ROPE_LEAF_SIZE:
+                return _RopeNode(a.left, _RopeLeaf(a.right.text + b.text))
+        elif isinstance(a, _RopeLeaf) and isinstance(b.left, _RopeLeaf) and a.length + b.left.length <= ROPE_LEAF_SIZE:
+            return _RopeNode(_RopeLeaf(a.text + b.left.text), b.right)
+        return _RopeNode(a, b)
+
+    def _split(self, node, pos):
+        if pos <= 0:
+            return _ROPE_EMPTY, node
+        if pos >= node.length:
+            return node, _ROPE_EMPTY
+        if isinstance(node, _RopeLeaf):
+            return _RopeLeaf(node.text[:pos]), _RopeLeaf(node.text[pos:])
+        left_len = node.left.length
+        if pos == left_len:
+            return node.left, node.right
+        if pos < left_len:
+            a, b = self._split(node.left, pos)
+            return a, self._concat(b, node.right)
+        a, b = self._split(node.right, pos - left_len)
+        return self._concat(node.left, a), b
+
+    def _rebalance(self):
+        limit = 2 * max(1, (self.root.length // ROPE_LEAF_SIZE).bit_length()) + 8
+        if self.root.depth <= limit:
+            return
+        chunks, buf, size = [], [], 0
+        for leaf in self.leaves():
+            if size + len(leaf) > ROPE_LEAF_SIZE and buf:
+                chunks.append("".join(buf))
+                buf, size = [], 0
+            buf.append(leaf)
+            size += len(leaf)
+        chunks.append("".join(buf))
+        self.root = self._build(chunks)
+
+    # ---------- Edits ----------
+    def insert(self, pos: int, s: str):
+        if not s:
+            return
+        left, right = self._split(self.root, pos)
+        self.root = self._concat(self._concat(left, self._build([s[i:i + ROPE_LEAF_SIZE] for i in range(0, len(s), ROPE_LEAF_SIZE)])), right)
+        self._rebalance()
+
+    def delete(self, start: int, end: int):
+        if end <= start:
+            return
+        left, rest = self._split(self.root, start)
+        _mid, right = self._split(rest, end - start)
+        self.root = self._concat(left, right)
+        self._rebalance()
+
+    # ---------- Queries ----------
+    def leaves(self):
+        stack = [self.root]
+        while stack:
+            node = stack.pop()
+            if isinstance(node, _RopeLeaf):
+                if node.length:
+                    yield node.text
+            else:
+                stack.append(node.right)
+                stack.append(node.left)
+
+    def to_str(self) -> str:
+        return "".join(self.leaves())
+
+    def slice(self, start: int, end: int) -> str:
+        out = []
+        self._collect(self.root, max(0, start), min(end, self.root.length), out)
+        return "".join(out)
+
+    def _collect(self, node, start, end, out):
+        if start >= end:
+            return
+        if isinstance(node, _RopeLeaf):
+            out.append(node.text[start:end])
+            return
+        left_len = node.left.length
+        if start < left_len:
+            self._collect(node.left, start, min(end, left_len), out)
+        if end > left_len:
+            self._collect(node.right, max(0, start - left_len), end - left_len, out)
+
+    def line_count(self) -> int:
+        return self.root.newlines + 1
+
+    def line_start(self, line: int) -> int:
+        """Char offset of the first character of 0-based `line`."""
+        if line <= 0:
+            return 0
+        if line > self.root.newlines:
+            return self.root.length
+        node = self.root
+        offset = 0
+        n = line
+        while isinstance(node, _RopeNode):
+            if n <= node.left.newlines:
+                node = node.left
+            else:
+                n -= node.left.newlines
+                offset += node.left.length
+                node = node.right
+        i = -1
+        for _ in range(n):
+            i = node.text.index("\n", i + 1)
+        return offset + i + 1
+
+    def line_of(self, offset: int):
+        """(0-based line, column) of char `offset`; inverse of line_start."""
+        offset = max(0, min(offset, self.root.length))
+        node = self.root
+        pos = offset
+        line = 0
+        while isinstance(node, _RopeNode):
+            if pos < node.left.length:
+                node = node.left
+            else:
+                pos -= node.left.length
+                line += node.left.newlines
+                node = node.right
+        line += node.text.count("\n", 0, pos)
+        return line, offset - self.line_start(line)
 
+    def line(self, line: int) -> str:
+        start = self.line_start(line)
+        if line >= self.root.newlines:
+            return self.slice(start, self.root.length)
+        return self.slice(start, self.line_start(line + 1) - 1)
 
-def sha1(s: str) -> str:
-    return hashlib.sha1(s.encode("utf-8", errors="ignore")).hexdigest()
+
+class LineStats:
+    """
+    Per-line minimap stats: length and non-whitespace char count.
+      - A count of -1 means "not measured yet"; filled when the minimap samples it
+      - Plain lists for small buffers
+      - int32 NumPy arrays once the buffer passes NUMPY_MIN_LINES (if installed)
+    """
+    def __init__(self, lines=("",)):
+        self.lens = []
+        self.nws = []
+        self.np = None
+        self.sample = None  # (step, limit, width) of the last bar_ends call
+        self.splice(0, 0, lines)
+
+    def __len__(self):
+        return len(self.lens)
+
+    def _maybe_vectorize(self):
+        if self.np is None and len(self.lens) >= NUMPY_MIN_LINES:
+            self.np = load_numpy()
+            if self.np is not None:
+                self.lens = self.np.array(self.lens, dtype=self.np.int32)
+                self.nws = self.np.array(self.nws, dtype=self.np.int32)
+
+    def splice(self, a: int, b: int, lines) -> bool:
+        """
+        Replace entries a:b with stats for `lines` (or an int: that many
+        unmeasured lines). True if the drawn minimap may have changed: the
+        line count moved, or a sampled line's bar width did.
+        """
+        if isinstance(lines, int):
+            lens = nws = [-1] * lines
+            changed = True
+        else:
+            lens = [len(s) for s in lines]
+            nws = [len(s.strip()) for s in lines]
+            changed = b - a != len(lens) or self._bars_changed(a, lens, nws)
+        if self.np is not None:
+            np = self.np
+            if b - a == len(lens):
+                self.lens[a:b] = lens
+                self.nws[a:b] = nws
+            else:
+                self.lens = np.concatenate((self.lens[:a], np.array(lens, dtype=np.int32), self.lens[b:]))
+                self.nws = np.concatenate((self.nws[:a], np.array(nws, dtype=np.int32), self.nws[b:]))
+        else:
+            self.lens[a:b] = lens
+            self.nws[a:b] = nws
+            self._maybe_vectorize()
+        return changed
+
+    def _bars_changed(self, a: int, lens, nws) -> bool:
+        # Same line count: only rows the last bar_ends call sampled are on screen
+        if self.sample is None:
+            return True
+        step, limit, width = self.sample
+        for i in range(-(-a // step) * step, min(a + len(lens), limit * step), step):
+            old_n, n = int(self.lens[i]), lens[i - a]
+            if old_n < 0:
+                return True
+            old_r = min(1.0, int(self.nws[i]) / old_n) if old_n else 0
+            r = min(1.0, nws[i - a] / n) if n else 0
+            if int(5 + (width - 10) * old_r) != int(5 + (width - 10) * r):
+                return True
+        return False
+
+    def _measure(self, i: int, s: str):
+        self.lens[i] = len(s)
+        self.nws[i] = len(s.strip())
+
+    def bar_ends(self, step: int, limit: int, width: int, line_text):
+        """
+        x2 of the minimap bar for every `step`-th line, at most `limit` bars.
+        `line_text(i)` supplies the text of sampled lines not measured yet.
+        """
+        self.sample = (step, limit, width)
+        if self.np is not None:
+            np = self.np
+            idx = np.arange(0, len(self.lens), step)[:limit]
+            for i in idx[self.lens[idx] < 0].tolist():
+                self._measure(i, line_text(i))
+            r = (self.nws[idx] / np.maximum(self.lens[idx], 1)).clip(0, 1)
+            return (5 + (width - 10) * r).astype(np.int32).tolist()
+        out = []
+        for i in range(0, min(len(self.lens), limit * step), step):
+            if self.lens[i] < 0:
+                self._measure(i, line_text(i))
+            n = self.lens[i]
+            ratio = min(1.0, self.nws[i] / n) if n else 0
+            out.append(int(5 + (width - 10) * ratio))
+        return out
+
+
+# Tcl-side proxy for a Text widget command: resolves indices before an edit
+# runs, performs it, then reports what changed to a Python callback.
+_TK_EDIT_PROXY = """
+proc ::editorpp_proxy {orig cb op args} {
+    switch -exact -- $op {
+        insert {
+            set at [$orig index [lindex $args 0]]
+            set r [$orig insert {*}$args]
+            $cb insert $at {*}[lrange $args 1 end]
+            return $r
+        }
+        delete {
+            set idx {}
+            foreach i $args { lappend idx [$orig index $i] }
+            if {[llength $idx] == 1} { lappend idx [$orig index "[lindex $idx 0] +1c"] }
+            if {[llength $idx] == 2} {
+                lassign $idx i1 i2
+                # Like Tk's DeleteIndexRange: a range ending at end keeps the final
+                # newline and takes the one before a line-start index1 instead
+                if {[$orig compare $i1 < $i2] && [$orig compare $i2 == end]
+                        && [string match {*.0} $i1] && $i1 ne "1.0"} {
+                    set idx [list [$orig index "$i1 -1c"] $i2]
+                }
+            }
+            set r [$orig delete {*}$args]
+            $cb delete {*}$idx
+            return $r
+        }
+        replace {
+            set a [$orig index [lindex $args 0]]
+            set b [$orig index [lindex $args 1]]
+            set r [$orig replace {*}$args]
+            $cb replace $a $b {*}[lrange $args 2 end]
+            return $r
+        }
+    }
+    tailcall $orig $op {*}$args
+}
+"""
 
 
 class MacroRecorder:
     """
     Simple macro recorder:
       - Records inserted characters, Return, Tab, BackSpace, Delete
+      - Stored as parallel arrays: one op byte per event, chars only for inserts
     """
+    OP_INS, OP_BS, OP_DEL = b"ibd"
+
     def __init__(self):
         self.recording = False
-        self.events = []  # ("ins","a") or ("bs",) or ("del",)
+        self._ops = bytearray()
+        self._chars = []
 
     def start(self):
         self.recording = True
-        self.events = []
+        self._ops = bytearray()
+        self._chars = []
 
     def stop(self):
         self.recording = False
 
+    def _insert(self, ch: str):
+        self._ops.append(self.OP_INS)
+        self._chars.append(ch)
+
     def record_key(self, event: tk.Event):
         if not self.recording:
             return
@@ -70,32 +516,42 @@ class MacroRecorder:
         ch = event.char
 
         if ks in ("BackSpace", "Delete"):
-            self.events.append(("bs" if ks == "BackSpace" else "del",))
+            self._ops.append(self.OP_BS if ks == "BackSpace" else self.OP_DEL)
             return
         if ks == "Return":
-            self.events.append(("ins", "\n"))
+            self._insert("\n")
             return
         if ks == "Tab":
-            self.events.append(("ins", "\t"))
+            self._insert("\t")
             return
 
         if ch and len(ch) == 1 and ord(ch) >= 32:
-            self.events.append(("ins", ch))
+            self._insert(ch)
 
     def play(self, text_widget: tk.Text):
-        for ev in self.events:
-            if ev[0] == "ins":
-                text_widget.insert("insert", ev[1])
-            elif ev[0] == "bs":
-                try:
-                    text_widget.delete("insert-1c", "insert")
-                except Exception:
-                    pass
-            elif ev[0] == "del":
-                try:
-                    text_widget.delete("insert", "insert+1c")
-                except Exception:
-                    pass
+        # One undo step for the whole macro; runs of the same op become one Tk call
+        text_widget.edit_separator()
+        text_widget.configure(autoseparators=False)
+        try:
+            ci = 0
+            for op, run in groupby(self._ops):
+                n = sum(1 for _ in run)
+                if op == self.OP_INS:
+                    text_widget.insert("insert", "".join(self._chars[ci:ci + n]))
+                    ci += n
+                elif op == self.OP_BS:
+                    try:
+                        text_widget.delete(f"insert-{n}c", "insert")
+                    except Exception:
+                        pass
+                elif op == self.OP_DEL:
+                    try:
+                        text_widget.delete("insert", f"insert+{n}c")
+                    except Exception:
+                        pass
+        finally:
+            text_widget.configure(autoseparators=True)
+            text_widget.edit_separator()
 
 
 class Document:
@@ -103,11 +559,13 @@ class Document:
         self.app = app
         self.filepath = filepath  # str or None
         self.dirty = False
-        self.last_saved_hash = sha1(initial_text)
-        self.autosave_id = sha1(f"{time.time()}-{id(self)}")
+        self._saved_len = len(initial_text)
+        self._saved_tail_hash = content_hash(initial_text[:1024] + initial_text[-1024:])
+        self._saved_hash = full_hash(initial_text)
+        self.autosave_id = content_hash(f"{time.time()}-{id(self)}")
 
         # Font
-        self.font_family = "Menlo" if "Menlo" in tkfont.families() else "Courier"
+        self.font_family = "Menlo" if "Menlo" in app.available_fonts else "Courier"
         self.font_size = 12
         self.font = tkfont.Font(family=self.font_family, size=self.font_size)
 
@@ -142,14 +600,35 @@ class Document:
         self.text.pack(side="left", fill="both", expand=True)
         self.vsb.config(command=self._on_scrollbar)
 
+        # Pending redraw work (see schedule_redraw)
+        self._dirty_flags = 0
+        self._redraw_after = None
+        self._last_yview = None
+
+        # Shadow buffer: mirrors every widget edit so reads never copy out of Tk
+        self.rope = Rope()
+        self.rope_exact = True  # rope offsets equal Tk index columns (no astral chars)
+        self.edit_count = 0  # bumped on every mirrored widget edit
+        self.autosaved_at = -1  # edit_count of the last autosave snapshot
+        self._line_stats = LineStats()  # minimap stats per line, kept in step with the rope
+        self._line_tag_hash = {}  # visible line number -> hash of the text its highlight tags were built from
+        self._dirty_lines = set()  # lines edited since the last highlight pass
+        self._tag_mode = (False, False)  # (show_whitespace, syntax_highlight) the tags reflect
+        self._install_edit_proxy()
+
         # Minimap canvas
         self.minimap = tk.Canvas(self.body, width=110, highlightthickness=0)
         self.minimap.pack(side="right", fill="y")
+        self._mm_image = tk.PhotoImage(master=self.minimap, width=1, height=1)
 
         # Behaviors
         self.show_whitespace = False
         self.syntax_highlight = True
 
+        # Gutter cache: line number -> (canvas item, y)
+        self._ln_items = {}
+        self._last_ln_state = None
+
         # Tags
         self._setup_tags()
 
@@ -160,17 +639,14 @@ class Document:
 
         # Bind events
         self.text.bind("<<Modified>>", self._on_modified)
-        self.text.bind("<KeyRelease>", self._on_cursor_activity)
+        self.text.bind("<KeyRelease>", self._on_key_activity)
         self.text.bind("<ButtonRelease-1>", self._on_cursor_activity)
-        self.text.bind("<MouseWheel>", self._on_cursor_activity)
-        self.text.bind("<Configure>", self._on_cursor_activity)
+        self.text.bind("<MouseWheel>", self._on_view_activity)
+        self.text.bind("<Configure>", self._on_view_activity)
 
         # Auto-indent
         self.text.bind("<Return>", self._auto_indent)
 
-        # Context menu
-        self._make_context_menu()
-
         # Apply fixed theme
         self.apply_theme()
 
@@ -193,40 +669,147 @@ class Document:
         self.text.tag_configure("syn_str", foreground="#a31515")
         self.text.tag_configure("syn_com", foreground="#6a737d")
 
-    def _make_context_menu(self):
-        self.ctx = tk.Menu(self.text, tearoff=0)
-        self.ctx.add_command(label="Undo", command=self.undo)
-        self.ctx.add_command(label="Redo", command=self.redo)
-        self.ctx.add_separator()
-        self.ctx.add_command(label="Cut", command=self.cut)
-        self.ctx.add_command(label="Copy", command=self.copy)
-        self.ctx.add_command(label="Paste", command=self.paste)
-        self.ctx.add_separator()
-        self.ctx.add_command(label="Select All", command=self.select_all)
-
-        def popup(event):
-            try:
-                self.ctx.tk_popup(event.x_root, event.y_root)
-            finally:
-                self.ctx.grab_release()
+    # ---------- Shadow buffer ----------
+    def _install_edit_proxy(self):
+        w = self.text._w
+        self._tk_orig = w + "_orig"
+        cb = self.text.register(self._on_tk_edit)
+        self.text.tk.eval(_TK_EDIT_PROXY)
+        self.text.tk.call("rename", w, self._tk_orig)
+        self.text.tk.call("interp", "alias", "", w, "", "::editorpp_proxy", self._tk_orig, cb)
+
+    def offset_of(self, index: str) -> int:
+        """Char offset in get_text() of a Tk "line.col" index (inverse of offset_index)."""
+        line, col = index.split(".")
+        line = int(line) - 1
+        if line >= self.rope.line_count():
+            return len(self.rope)
+        return min(self.rope.line_start(line) + int(col), len(self.rope))
+
+    def offset_index(self, offset: int) -> str:
+        """Tk "line.col" index of char `offset` in get_text()."""
+        line, col = self.rope.line_of(offset)
+        return f"{line + 1}.{col}"
+
+    def _resync_rope(self):
+        text = self.text.tk.call(self._tk_orig, "get", "1.0", "end-1c")
+        self.rope = Rope(text)
+        # Tk counts astral chars as two index columns; Python as one
+        self.rope_exact = not text or max(text) <= "\uffff"
+        self._line_stats = LineStats(self.rope.line_count())
+        self._line_tag_hash.clear()
+        self.schedule_redraw(REDRAW_MINIMAP | REDRAW_SYNTAX)
+
+    def _index_line(self, index: str) -> int:
+        return min(int(index.split(".")[0]), self.rope.line_count()) - 1
+
+    def _rope_replace(self, index: str, start: int, end: int, s: str):
+        line = self._index_line(index)
+        removed_nl = self.rope.slice(start, end).count("\n") if end > start else 0
+        self.rope.delete(start, end)
+        self.rope.insert(start, s)
+        self._lines_changed(line, removed_nl, s.count("\n"))
+
+    def _lines_changed(self, line: int, removed_nl: int, added_nl: int):
+        # Lines line..line+removed_nl became line..line+added_nl
+        last = line + added_nl
+        if added_nl >= LAZY_STATS_LINES:
+            # Big paste / file load: only lines the minimap samples get measured
+            lines = added_nl + 1
+        else:
+            start = self.rope.line_start(line)
+            end = self.rope.line_start(last + 1) - 1 if last < self.rope.line_count() - 1 else len(self.rope)
+            lines = self.rope.slice(start, end).split("\n")
+        if self._line_stats.splice(line, line + removed_nl + 1, lines):
+            self.schedule_redraw(REDRAW_MINIMAP)
+
+        # Tk moves tags along with the text, so lines below the edit only need
+        # their cache keys shifted; the edited lines themselves become dirty
+        delta = added_nl - removed_nl
+        old_last = line + removed_nl + 1
+        if delta:
+            self._line_tag_hash = {
+                (k + delta if k > old_last else k): h
+                for k, h in self._line_tag_hash.items() if not line < k <= old_last
+            }
+            self._dirty_lines = {k + delta if k > old_last else k for k in self._dirty_lines if not line < k <= old_last}
+        else:
+            for n in range(line + 1, old_last + 1):
+                self._line_tag_hash.pop(n, None)
+        self._dirty_lines.update(range(line + 1, last + 2))
+        self.schedule_redraw(REDRAW_EDITED)
+
+    def _on_tk_edit(self, op, *args):
+        self.edit_count += 1
+        lines_before = self.rope.line_count()
+        try:
+            self._mirror_edit(op, args)
+        except Exception:
+            self._resync_rope()
+        if self.rope.line_count() != lines_before:
+            self.schedule_redraw(REDRAW_LINE_NUMS | REDRAW_MINIMAP)
 
-        self.text.bind("<Button-3>", popup)              # Windows/Linux
-        self.text.bind("<Control-Button-1>", popup)      # macOS fallback
+    def _mirror_edit(self, op, args):
+        if not self.rope_exact:
+            self._resync_rope()
+            return
+        if op == "insert":
+            s = "".join(args[1::2])
+            if s and max(s) > "\uffff":
+                self._resync_rope()
+                return
+            pos = self.offset_of(args[0])
+            self._rope_replace(args[0], pos, pos, s)
+        elif op == "delete" and len(args) <= 2:
+            start = self.offset_of(args[0])
+            end = self.offset_of(args[1]) if len(args) == 2 else start + 1  # proxy sends pairs
+            self._rope_replace(args[0], start, min(end, len(self.rope)), "")
+        elif op == "replace" and len(args) >= 3:
+            s = "".join(args[2::2])
+            if max(s, default="") > "\uffff":
+                self._resync_rope()
+                return
+            start = self.offset_of(args[0])
+            end = self.offset_of(args[1])
+            self._rope_replace(args[0], start, end, s)
+        else:
+            self._resync_rope()
 
     # ---------- Basic ops ----------
     def get_text(self) -> str:
-        return self.text.get("1.0", "end-1c")
+        return self.rope.to_str()
 
     def set_dirty(self, is_dirty: bool):
         if self.dirty != is_dirty:
             self.dirty = is_dirty
             self.app.update_tab_title(self)
-            self.app.update_status()
+            self.app.schedule_status()
+
+    def _tail_hash(self) -> str:
+        n = len(self.rope)
+        return content_hash(self.rope.slice(0, 1024) + self.rope.slice(n - 1024, n))
 
     def mark_saved(self):
-        self.last_saved_hash = sha1(self.get_text())
+        self._saved_len = len(self.rope)
+        self._saved_tail_hash = self._tail_hash()
+        self._saved_hash = full_hash(self.rope.leaves())
         self.set_dirty(False)
 
+    def matches_saved(self) -> bool:
+        # Length + head/tail hash can only prove a change; "clean" needs the full digest
+        if len(self.rope) != self._saved_len or self._tail_hash() != self._saved_tail_hash:
+            return False
+        return full_hash(self.rope.leaves()) == self._saved_hash
+
+    def refresh_dirty(self):
+        if self.dirty and self.matches_saved():
+            self.set_dirty(False)
+
+    def forget_saved(self):
+        # Content never hit disk (e.g. recovered snapshot): nothing to match against
+        self._saved_len = -1
+        self.set_dirty(True)
+
     def undo(self):
         try:
             self.text.edit_undo()
@@ -268,19 +851,46 @@ class Document:
     # ---------- Scroll / redraw ----------
     def _on_scrollbar(self, *args):
         self.text.yview(*args)
-        self.redraw_all()
+        self.schedule_redraw(REDRAW_LINE_NUMS | REDRAW_SYNTAX | REDRAW_MINIMAP)
 
     def _on_textscroll(self, first, last):
         self.vsb.set(first, last)
-        self.redraw_all()
+        if (first, last) != self._last_yview:
+            self._last_yview = (first, last)
+            self.schedule_redraw(REDRAW_LINE_NUMS | REDRAW_SYNTAX | REDRAW_MINIMAP)
+
+    def schedule_redraw(self, flags=REDRAW_ALL):
+        """Queue the given REDRAW_* passes for the next idle flush."""
+        self._dirty_flags |= flags
+        if self._redraw_after is None:
+            self._redraw_after = self.text.after_idle(self._flush_redraw)
+
+    def _flush_redraw(self):
+        flags = self._dirty_flags
+        self._dirty_flags = 0
+        self._redraw_after = None
+        self._redraw(flags)
 
     def redraw_all(self):
-        self._draw_line_numbers()
-        self._highlight_current_line()
-        self._highlight_brackets()
-        self._update_visible_highlighting()
-        self._draw_minimap()
-        self.app.update_status()
+        if self._redraw_after is not None:
+            self.text.after_cancel(self._redraw_after)
+            self._redraw_after = None
+        self._dirty_flags = 0
+        self._redraw(REDRAW_ALL)
+
+    def _redraw(self, flags):
+        if flags & REDRAW_LINE_NUMS:
+            self._draw_line_numbers()
+        if flags & REDRAW_BRACKETS:
+            self._highlight_current_line()
+            self._highlight_brackets()
+        if flags & REDRAW_SYNTAX:
+            self._update_visible_highlighting()
+        elif flags & REDRAW_EDITED:
+            self._redraw_edited_lines()
+        if flags & REDRAW_MINIMAP:
+            self._draw_minimap()
+        self.app.schedule_status()
 
     def _visible_line_range(self):
         first_idx = self.text.index("@0,0")
@@ -290,66 +900,83 @@ class Document:
         return first_line, last_line
 
     def _draw_line_numbers(self):
-        c = self.app.colors
-        self.ln.delete("all")
         first_line, last_line = self._visible_line_range()
+        total = self.rope.line_count()
+        font = (self.font_family, max(9, self.font_size - 1))
+
+        # Nothing scrolled, no lines added/removed, no wrap shift: gutter is already right.
+        # The last visible line's geometry moves whenever wrapping above it changes.
+        tail = self.text.dlineinfo(f"{min(last_line, total)}.0")
+        state = (self.text.yview(), first_line, last_line, total, font, tail)
+        if state == self._last_ln_state:
+            return
+        if self._last_ln_state is None or self._last_ln_state[4] != font:
+            self.ln.delete("all")
+            self._ln_items = {}
+        self._last_ln_state = state
 
         bbox = self.text.bbox("1.0")
         line_h = bbox[3] if bbox else 18
 
-        for line in range(first_line, last_line + 1):
+        seen = set()
+        for line in range(first_line, min(last_line, total) + 1):
             idx = f"{line}.0"
             info = self.text.dlineinfo(idx)
             if info is None:
                 continue
-            y0 = info[1]
-            self.ln.create_text(
-                45, y0 + line_h // 2,
-                text=str(line),
-                anchor="e",
-                fill=c["line_num_fg"],
-                font=(self.font_family, max(9, self.font_size - 1)),
-            )
-
-        self.ln.config(background=c["gutter_bg"])
+            y = info[1] + line_h // 2
+            seen.add(line)
+            cached = self._ln_items.get(line)
+            if cached is None:
+                item = self.ln.create_text(
+                    45, y,
+                    text=str(line),
+                    anchor="e",
+                    fill=self._c_line_num_fg,
+                    font=font,
+                )
+                self._ln_items[line] = (item, y)
+            elif cached[1] != y:
+                self.ln.coords(cached[0], 45, y)
+                self._ln_items[line] = (cached[0], y)
+
+        for line in [n for n in self._ln_items if n not in seen]:
+            self.ln.delete(self._ln_items.pop(line)[0])
 
     def _draw_minimap(self):
-        c = self.app.colors
         self.minimap.delete("all")
-        self.minimap.config(background=c["minimap_bg"])
-
-        content = self.get_text()
-        lines = content.splitlines() or [""]
 
         h = max(1, self.minimap.winfo_height())
         w = max(1, self.minimap.winfo_width())
 
-        total = len(lines)
-        if total <= 0:
-            return
+        total = len(self._line_stats)
 
         first, last = self.text.yview()
 
         step = max(1, total // max(1, h))
-        y = 0
-        for i in range(0, total, step):
-            s = lines[i]
-            non_ws = len(s.strip())
-            ratio = 0 if len(s) == 0 else min(1.0, non_ws / max(1, len(s)))
-            x2 = int(5 + (w - 10) * ratio)
-            self.minimap.create_line(5, y, x2, y, fill=c["minimap_fg"])
-            y += 1
-            if y >= h - 2:
-                break
+        bars = self._line_stats.bar_ends(step, max(0, h - 2), w, self.rope.line)
+        if bars:
+            # All bars go into one image: a single put instead of a canvas item per line
+            fg, bg = self._c_mm_fg, self._c_mm_bg
+            left = min(5, w)
+            rows = {}
+            for x2 in set(bars):
+                k = max(0, min(w, x2) - left)
+                rows[x2] = "{" + " ".join([bg] * left + [fg] * k + [bg] * (w - left - k)) + "}"
+            img = self._mm_image
+            img.blank()
+            img.configure(width=w, height=len(bars))
+            img.put(" ".join(rows[x2] for x2 in bars), to=(0, 0))
+            self.minimap.create_image(0, 0, anchor="nw", image=img)
 
         y1 = int(first * h)
         y2 = int(last * h)
-        self.minimap.create_rectangle(2, y1, w - 2, y2, outline=c["minimap_viewport"])
+        self.minimap.create_rectangle(2, y1, w - 2, y2, outline=self._c_mm_vp)
 
         def on_click(ev):
             frac = ev.y / max(1, h)
             self.text.yview_moveto(max(0.0, min(1.0, frac)))
-            self.redraw_all()
+            self.schedule_redraw()
 
         self.minimap.bind("<Button-1>", on_click)
 
@@ -357,11 +984,17 @@ class Document:
     def _on_modified(self, _event=None):
         if self.text.edit_modified():
             self.text.edit_modified(False)
-            now_hash = sha1(self.get_text())
-            self.set_dirty(now_hash != self.last_saved_hash)
+            self.set_dirty(True)
+
+    def _on_key_activity(self, _event=None):
+        # Edits raise REDRAW_EDITED themselves (see _lines_changed)
+        self.schedule_redraw(REDRAW_LINE_NUMS | REDRAW_BRACKETS)
 
     def _on_cursor_activity(self, _event=None):
-        self.redraw_all()
+        self.schedule_redraw(REDRAW_BRACKETS)
+
+    def _on_view_activity(self, _event=None):
+        self.schedule_redraw()
 
     def _highlight_current_line(self):
         self.text.tag_remove("current_line", "1.0", "end")
@@ -378,76 +1011,79 @@ class Document:
         opens = "([{"
 
         try:
-            idx = self.text.index("insert")
-            before = self.text.get("insert-1c", "insert")
-            at = self.text.get("insert", "insert+1c")
-            ch = before if before in pairs else (at if at in pairs else "")
+            # One bounded window around the cursor instead of a Tk call per char
+            if self.rope_exact:
+                off = self.offset_of(self.text.index("insert"))
+                lo = max(0, off - BRACKET_SCAN_CHARS)
+                win = self.rope.slice(lo, off + BRACKET_SCAN_CHARS)
+                cursor = off - lo
+
+                def to_index(k):
+                    return self.offset_index(lo + k)
+            else:
+                before = self.text.get(f"insert-{BRACKET_SCAN_CHARS}c", "insert")
+                win = before + self.text.get("insert", f"insert+{BRACKET_SCAN_CHARS}c")
+                cursor = len(before)
+
+                def to_index(k):
+                    return f"insert{k - cursor:+d}c"
+
+            prev, at = win[cursor - 1:cursor], win[cursor:cursor + 1]
+            ch = prev if prev in pairs else (at if at in pairs else "")
             if not ch:
                 return
 
             if ch in opens:
-                start = idx if at == ch else self.text.index("insert-1c")
-                match_idx = self._find_matching_forward(start, ch, pairs[ch])
-                if match_idx:
-                    self.text.tag_add("bracket_match", start, f"{start}+1c")
-                    self.text.tag_add("bracket_match", match_idx, f"{match_idx}+1c")
+                here = cursor if at == ch else cursor - 1
+                match = self._find_matching_forward(win, here, ch, pairs[ch])
             else:
-                here = self.text.index("insert-1c") if before == ch else idx
-                match_idx = self._find_matching_backward(here, pairs[ch], ch)
-                if match_idx:
-                    self.text.tag_add("bracket_match", match_idx, f"{match_idx}+1c")
-                    self.text.tag_add("bracket_match", here, f"{here}+1c")
+                here = cursor - 1 if prev == ch else cursor
+                match = self._find_matching_backward(win, here, pairs[ch], ch)
+            if match is None:
+                return
+
+            self.text.tag_add("bracket_match", to_index(here), to_index(here + 1), to_index(match), to_index(match + 1))
         except Exception:
             pass
 
-    def _find_matching_forward(self, start_idx, open_ch, close_ch):
+    @staticmethod
+    def _find_matching_forward(s, start, open_ch, close_ch):
         depth = 0
-        i = start_idx
-        limit = 200000
-        count = 0
-        while count < limit:
-            ch = self.text.get(i, f"{i}+1c")
-            if not ch:
-                break
+        for k, ch in enumerate(s[start:], start):
             if ch == open_ch:
                 depth += 1
             elif ch == close_ch:
                 depth -= 1
                 if depth == 0:
-                    return i
-            i = self.text.index(f"{i}+1c")
-            count += 1
+                    return k
         return None
 
-    def _find_matching_backward(self, start_idx, open_ch, close_ch):
+    @staticmethod
+    def _find_matching_backward(s, start, open_ch, close_ch):
         depth = 0
-        i = start_idx
-        limit = 200000
-        count = 0
-        while count < limit:
-            ch = self.text.get(i, f"{i}+1c")
+        for k in range(start, -1, -1):
+            ch = s[k]
             if ch == close_ch:
                 depth += 1
             elif ch == open_ch:
                 depth -= 1
                 if depth == 0:
-                    return i
-            if i == "1.0":
-                break
-            i = self.text.index(f"{i}-1c")
-            count += 1
+                    return k
         return None
 
     def _auto_indent(self, event):
         try:
-            line_start = self.text.index("insert linestart")
-            line_end = self.text.index("insert lineend")
-            line_text = self.text.get(line_start, line_end)
-
-            indent = re.match(r"[ \t]*", line_text).group(0)  # type: ignore
-            extra = ""
-            if line_text.rstrip().endswith(":"):
-                extra = " " * 4
+            # Only the leading whitespace matters; don't copy out a long line
+            prefix = self.text.get("insert linestart", "insert linestart+64c").split("\n", 1)[0]
+            indent = prefix[:len(prefix) - len(prefix.lstrip(" \t"))]
+            if len(indent) == 64:
+                line_text = self.text.get("insert linestart", "insert lineend")
+                indent = line_text[:len(line_text) - len(line_text.lstrip(" \t"))]
+
+            tail = self.text.get("insert-1c", "insert")
+            if tail in (" ", "\t"):
+                tail = self.text.get("insert linestart", "insert").rstrip()[-1:]
+            extra = " " * 4 if tail == ":" else ""
 
             self.text.insert("insert", "\n" + indent + extra)
             return "break"
@@ -456,26 +1092,52 @@ class Document:
 
     # ---------- Highlighting ----------
     def _update_visible_highlighting(self):
+        mode = (self.show_whitespace, self.syntax_highlight)
+        if mode != self._tag_mode:
+            # A feature was toggled: drop every highlight tag once, rebuild lazily
+            for tag in HL_TAGS:
+                self.text.tag_remove(tag, "1.0", "end")
+            self._line_tag_hash.clear()
+            self._tag_mode = mode
+        if any(mode):
+            first_line, last_line = self._visible_line_range()
+            self.redraw_lines(range(first_line, min(last_line, self.rope.line_count()) + 1))
+            # Keep the cache to what's on screen so edits only ever rekey a screenful
+            self._line_tag_hash = {k: h for k, h in self._line_tag_hash.items() if first_line <= k <= last_line}
+        self._dirty_lines.clear()
+
+    def _redraw_edited_lines(self):
+        # Only lines touched by edits since the last pass; off-screen ones are
+        # picked up by the hash check once they scroll into view
+        dirty = self._dirty_lines
+        self._dirty_lines = set()
+        if not dirty or not any(self._tag_mode):
+            return
         first_line, last_line = self._visible_line_range()
-        start = f"{first_line}.0"
-        end = f"{last_line}.0 lineend"
+        self.redraw_lines(sorted(n for n in dirty if first_line <= n <= last_line))
 
-        # Whitespace tags
-        for tag in ("ws_space", "ws_tab", "ws_eol"):
-            self.text.tag_remove(tag, start, end)
+    def redraw_lines(self, lines):
+        """Re-tag whitespace/syntax on the given 1-based lines whose text changed."""
+        cache = self._line_tag_hash
+        for line in lines:
+            s = self.rope.line(line - 1)
+            h = hash(s)
+            if cache.get(line) == h:
+                continue
+            cache[line] = h
 
-        if self.show_whitespace:
-            for line in range(first_line, last_line + 1):
-                ls = f"{line}.0"
-                le = f"{line}.0 lineend"
-                s = self.text.get(ls, le)
+            ls = f"{line}.0"
+            le = f"{line}.0 lineend"
+            for tag in HL_TAGS:
+                self.text.tag_remove(tag, ls, f"{le}+1c")
 
-                for m in re.finditer(r"\t", s):
+            if self.show_whitespace:
+                for m in WS_TAB.finditer(s):
                     a = f"{line}.{m.start()}"
                     b = f"{line}.{m.start()+1}"
                     self.text.tag_add("ws_tab", a, b)
 
-                for m in re.finditer(r" +", s):
+                for m in WS_SP.finditer(s):
                     a = f"{line}.{m.start()}"
                     b = f"{line}.{m.end()}"
                     self.text.tag_add("ws_space", a, b)
@@ -485,39 +1147,14 @@ class Document:
                 except Exception:
                     pass
 
-        # Syntax tags
-        for tag in ("syn_kw", "syn_str", "syn_com"):
-            self.text.tag_remove(tag, start, end)
-
-        if self.syntax_highlight:
-            self._python_syntax_highlight_visible(first_line, last_line)
-
-    def _python_syntax_highlight_visible(self, first_line, last_line):
-        for line in range(first_line, last_line + 1):
-            ls = f"{line}.0"
-            le = f"{line}.0 lineend"
-            s = self.text.get(ls, le)
-
-            # strings (single-line, simple)
-            for m in re.finditer(r"(\"[^\"]*\"|\'[^\']*\')", s):
-                a = f"{line}.{m.start()}"
-                b = f"{line}.{m.end()}"
-                self.text.tag_add("syn_str", a, b)
-
-            # comments
-            m = re.search(r"#.*$", s)
-            if m:
-                a = f"{line}.{m.start()}"
-                b = f"{line}.{m.end()}"
-                self.text.tag_add("syn_com", a, b)
-
-            # keywords
-            for m in re.finditer(r"\b[A-Za-z_][A-Za-z_0-9]*\b", s):
-                word = m.group(0)
-                if word in PY_KEYWORDS:
+            if self.syntax_highlight:
+                for m in TOK_RE.finditer(s):
+                    kind = m.lastgroup
+                    if kind == "kw" and m.group(0) not in PY_KEYWORDS:
+                        continue
                     a = f"{line}.{m.start()}"
                     b = f"{line}.{m.end()}"
-                    self.text.tag_add("syn_kw", a, b)
+                    self.text.tag_add(SYN_TAGS[kind], a, b)
 
     # ---------- Fixed theme ----------
     def apply_theme(self):
@@ -529,8 +1166,17 @@ class Document:
             selectbackground=c["select_bg"],
             selectforeground=c["select_fg"],
         )
-        self.ln.config(background=c["gutter_bg"])
-        self.minimap.config(background=c["minimap_bg"])
+
+        # Resolved once here for the redraw paths
+        self._c_line_num_fg = c["line_num_fg"]
+        self._c_gutter_bg = c["gutter_bg"]
+        self._c_mm_fg = c["minimap_fg"]
+        self._c_mm_vp = c["minimap_viewport"]
+        self._c_mm_bg = c["minimap_bg"]
+
+        self.ln.config(background=self._c_gutter_bg)
+        self.minimap.config(background=self._c_mm_bg)
+        self._last_ln_state = None  # recolor gutter numbers on next draw
 
 
 class App:
@@ -554,9 +1200,16 @@ class App:
             "minimap_viewport": "#4a86e8",
         }
 
+        # Installed font families, queried from Tk once
+        self.available_fonts = frozenset(tkfont.families())
+        self._font_choices = None  # sorted families for the font picker, built on first open
+
         # State
         self.documents = []
-        self.recent_files = []
+        self.recent_files = OrderedDict()  # abs path -> True, most recent last
+        self._re_cache = {}  # (needle, case sensitive) -> compiled pattern
+        self._status_pending = False
+        self._status_key = None  # (doc, path, dirty, edit count, caret) last shown
         self.autosave_seconds = DEFAULT_AUTOSAVE_SECONDS
         self.save_on_focus_lost = tk.BooleanVar(value=False)
 
@@ -582,6 +1235,7 @@ class App:
         self.tree = ttk.Treeview(self.left, show="tree")
         self.tree.pack(fill="both", expand=True, padx=8, pady=6)
         self.tree.bind("<Double-1>", self._on_tree_open)
+        self.tree.bind("<<TreeviewOpen>>", self._on_tree_expand)
 
         btns = ttk.Frame(self.left)
         btns.pack(fill="x", padx=8, pady=(0, 8))
@@ -600,6 +1254,7 @@ class App:
 
         # Menus
         self._build_menus()
+        self._build_context_menu()
 
         # Macro recorder
         self.macro = MacroRecorder()
@@ -613,6 +1268,8 @@ class App:
         if not self.documents:
             self.new_file()
 
+        self._autosave_q = queue.Queue()
+        threading.Thread(target=self._autosave_worker, daemon=True).start()
         self._autosave_tick()
         self.root.protocol("WM_DELETE_WINDOW", self.exit_app)
 
@@ -690,6 +1347,29 @@ class App:
         self.macromenu.add_command(label="Play Macro", command=self.macro_play)
         self.menubar.add_cascade(label="Macros", menu=self.macromenu)
 
+    def _build_context_menu(self):
+        # One menu shared by every tab; commands act on whichever doc is current
+        self.ctx = tk.Menu(self.root, tearoff=0)
+        self.ctx.add_command(label="Undo", command=lambda: self.current_doc().undo())
+        self.ctx.add_command(label="Redo", command=lambda: self.current_doc().redo())
+        self.ctx.add_separator()
+        self.ctx.add_command(label="Cut", command=lambda: self.current_doc().cut())
+        self.ctx.add_command(label="Copy", command=lambda: self.current_doc().copy())
+        self.ctx.add_command(label="Paste", command=lambda: self.current_doc().paste())
+        self.ctx.add_separator()
+        self.ctx.add_command(label="Select All", command=lambda: self.current_doc().select_all())
+
+        self.root.bind_class("Text", "<Button-3>", self._popup_menu, add="+")          # Windows/Linux
+        self.root.bind_class("Text", "<Control-Button-1>", self._popup_menu, add="+")  # macOS fallback
+
+    def _popup_menu(self, event):
+        if not self.current_doc(safe=True):
+            return
+        try:
+            self.ctx.tk_popup(event.x_root, event.y_root)
+        finally:
+            self.ctx.grab_release()
+
     # ---------- Shortcuts ----------
     def _bind_shortcuts(self):
         r = self.root
@@ -750,7 +1430,7 @@ class App:
 
     def open_file(self, path: str):
         for doc in self.documents:
-            if doc.filepath and os.path.abspath(doc.filepath) == os.path.abspath(path):
+            if doc.filepath and abspath(doc.filepath) == abspath(path):
                 self.notebook.select(doc.frame)
                 return
 
@@ -780,6 +1460,7 @@ class App:
         doc = self.current_doc(safe=True)
         if not doc:
             return
+        doc.refresh_dirty()
         if doc.dirty:
             res = messagebox.askyesnocancel("Unsaved changes", "Save before closing this tab?")
             if res is None:
@@ -810,7 +1491,7 @@ class App:
         if not doc.filepath:
             return self.save_doc_as(doc)
         try:
-            safe_write_text(doc.filepath, doc.get_text())
+            safe_write_text(doc.filepath, doc.rope)
             doc.mark_saved()
             self.update_tab_title(doc)
             self.add_recent(doc.filepath)
@@ -836,6 +1517,8 @@ class App:
 
     def confirm_discard_if_needed(self) -> bool:
         doc = self.current_doc(safe=True)
+        if doc:
+            doc.refresh_dirty()
         if not doc or not doc.dirty:
             return True
         res = messagebox.askyesnocancel("Unsaved changes", "You have unsaved changes. Save before continuing?")
@@ -847,11 +1530,20 @@ class App:
 
     # ---------- Recent files ----------
     def add_recent(self, path: str):
-        path = os.path.abspath(path)
-        self.recent_files = [p for p in self.recent_files if p != path]
-        self.recent_files.insert(0, path)
-        self.recent_files = self.recent_files[:MAX_RECENT]
-        self._rebuild_recent_menu()
+        path = abspath(path)
+        if next(reversed(self.recent_files), None) == path:
+            return  # already first; menu and state are current
+        # Patch the menu (newest first) instead of rebuilding every entry
+        if not self.recent_files:
+            self.recent_menu.delete(0)  # "(empty)" placeholder
+        elif path in self.recent_files:
+            self.recent_menu.delete(len(self.recent_files) - 1 - list(self.recent_files).index(path))
+            del self.recent_files[path]
+        elif len(self.recent_files) >= MAX_RECENT:
+            self.recent_files.popitem(last=False)
+            self.recent_menu.delete(tk.END)
+        self.recent_files[path] = True
+        self.recent_menu.insert_command(0, label=path, command=lambda x=path: self.open_file(x))
         self._save_state()
 
     def _rebuild_recent_menu(self):
@@ -859,7 +1551,7 @@ class App:
         if not self.recent_files:
             self.recent_menu.add_command(label="(empty)", state=tk.DISABLED)
             return
-        for p in self.recent_files:
+        for p in reversed(self.recent_files):
             self.recent_menu.add_command(label=p, command=lambda x=p: self.open_file(x))
 
     # ---------- Find / Replace / Go-to ----------
@@ -867,6 +1559,45 @@ class App:
         doc.text.tag_remove("find_hit", "1.0", "end")
         doc.text.tag_remove("find_current", "1.0", "end")
 
+    def _find_pattern(self, needle: str, case: bool):
+        # Compiled literal patterns, reused across Find / Find Next / Replace All clicks
+        key = (needle, case)
+        pat = self._re_cache.get(key)
+        if pat is None:
+            if len(self._re_cache) >= FIND_CACHE_SIZE:
+                del self._re_cache[next(iter(self._re_cache))]
+            pat = self._re_cache[key] = self._compile_find(re.escape(needle), case)
+        return pat
+
+    @staticmethod
+    def _compile_find(pattern: str, case: bool):
+        # re2 can't backtrack catastrophically on user patterns; fall back to re if it rejects one.
+        # Case-insensitivity goes inline: re2.compile takes an Options object, not re flags.
+        re2 = load_re2()
+        if re2 is not None:
+            try:
+                return re2.compile(pattern if case else "(?i)" + pattern)
+            except re2.error:
+                pass
+        return re.compile(pattern, 0 if case else re.IGNORECASE)
+
+    def _find_spans(self, content: str, needle: str, case: bool):
+        """(start, end) of every non-overlapping literal match, via str.find."""
+        if case:
+            hay, nd = content, needle
+        else:
+            hay, nd = content.lower(), needle.lower()
+            if len(hay) != len(content) or len(nd) != len(needle):
+                # lower() changed lengths (e.g. "İ"): offsets wouldn't line up
+                return [m.span() for m in self._find_pattern(needle, False).finditer(content)]
+        spans = []
+        n = len(nd)
+        i = hay.find(nd)
+        while i >= 0:
+            spans.append((i, i + n))
+            i = hay.find(nd, i + n)
+        return spans
+
     def find_dialog(self):
         doc = self.current_doc()
         win = tk.Toplevel(self.root)
@@ -888,24 +1619,22 @@ class App:
             if not needle:
                 return
 
-            start = doc.text.index("insert") if next_hit else "1.0"
-            idx = doc.text.search(
-                needle, start, stopindex="end",
-                nocase=(0 if case_var.get() else 1)
-            )
-
+            # One scan of the buffer; the current hit is the first span at/after the cursor
             content = doc.get_text()
-            flags = 0 if case_var.get() else re.IGNORECASE
+            hits = self._find_spans(content, needle, case_var.get())
+            start = doc.offset_of(doc.text.index("insert")) if next_hit else 0
+            k = bisect_left(hits, (start,))
+
             try:
-                for m in re.finditer(re.escape(needle), content, flags):
-                    a = doc.text.index(f"1.0+{m.start()}c")
-                    b = doc.text.index(f"1.0+{m.end()}c")
-                    doc.text.tag_add("find_hit", a, b)
+                # Hits are sorted: one sweep maps every offset to line.col, then one tag_add
+                spans = offset_indices(content, (o for span in hits for o in span))
+                if spans:
+                    doc.text.tag_add("find_hit", *spans)
             except Exception:
                 pass
 
-            if idx:
-                end = f"{idx}+{len(needle)}c"
+            if k < len(hits):
+                idx, end = doc.offset_index(hits[k][0]), doc.offset_index(hits[k][1])
                 doc.text.tag_add("find_current", idx, end)
                 doc.text.mark_set("insert", end)
                 doc.text.see(idx)
@@ -963,12 +1692,30 @@ class App:
             if not needle:
                 return
             content = doc.get_text()
-            if case_var.get():
-                new = content.replace(needle, repl)
-            else:
-                new = re.sub(re.escape(needle), repl, content, flags=re.IGNORECASE)
-            doc.text.delete("1.0", "end")
-            doc.text.insert("1.0", new)
+            # Hits whose text already equals repl would leave the buffer unchanged
+            spans = [(a, b) for a, b in self._find_spans(content, needle, case_var.get()) if content[a:b] != repl]
+            if not spans:
+                return
+            # One undo step either way
+            doc.text.edit_separator()
+            doc.text.configure(autoseparators=False)
+            try:
+                if doc.rope_exact and len(spans) <= REPLACE_REGION_MAX:
+                    # Back to front so earlier offsets stay valid; Tk re-lays out only these lines
+                    for a, b in reversed(spans):
+                        doc.text.replace(doc.offset_index(a), doc.offset_index(b), repl)
+                else:
+                    parts = []
+                    prev = 0
+                    for a, b in spans:
+                        parts += [content[prev:a], repl]
+                        prev = b
+                    parts.append(content[prev:])
+                    doc.text.delete("1.0", "end")
+                    doc.text.insert("1.0", "".join(parts))
+            finally:
+                doc.text.configure(autoseparators=True)
+                doc.text.edit_separator()
             doc.redraw_all()
 
         ttk.Button(win, text="Replace", command=replace_one).grid(row=3, column=0, padx=8, pady=8)
@@ -997,17 +1744,17 @@ class App:
     def toggle_wrap(self):
         doc = self.current_doc()
         doc.text.config(wrap=tk.WORD if self.wrap_var.get() else tk.NONE)
-        doc.redraw_all()
+        doc.schedule_redraw()
 
     def toggle_whitespace(self):
         doc = self.current_doc()
         doc.show_whitespace = self.ws_var.get()
-        doc.redraw_all()
+        doc.schedule_redraw()
 
     def toggle_syntax(self):
         doc = self.current_doc()
         doc.syntax_highlight = self.syn_var.get()
-        doc.redraw_all()
+        doc.schedule_redraw()
 
     def font_picker(self):
         doc = self.current_doc()
@@ -1017,16 +1764,16 @@ class App:
         win.transient(self.root)
         win.resizable(False, False)
 
-        families = sorted(tkfont.families())
-        sizes = list(range(8, 29))
+        if self._font_choices is None:
+            self._font_choices = sorted(self.available_fonts)
 
         ttk.Label(win, text="Family:").grid(row=0, column=0, padx=8, pady=8, sticky="w")
-        fam = ttk.Combobox(win, values=families, width=30, state="readonly")
+        fam = ttk.Combobox(win, values=self._font_choices, width=30, state="readonly")
         fam.set(doc.font_family)
         fam.grid(row=0, column=1, padx=8, pady=8)
 
         ttk.Label(win, text="Size:").grid(row=1, column=0, padx=8, pady=8, sticky="w")
-        size = ttk.Combobox(win, values=sizes, width=10, state="readonly")
+        size = ttk.Combobox(win, values=FONT_SIZES, width=10, state="readonly")
         size.set(doc.font_size)
         size.grid(row=1, column=1, padx=8, pady=8, sticky="w")
 
@@ -1034,7 +1781,7 @@ class App:
             doc.font_family = fam.get()
             doc.font_size = int(size.get())
             doc.font.config(family=doc.font_family, size=doc.font_size)
-            doc.redraw_all()
+            doc.schedule_redraw()
 
         ttk.Button(win, text="Apply", command=apply).grid(row=2, column=0, padx=8, pady=8)
         ttk.Button(win, text="Close", command=win.destroy).grid(row=2, column=1, padx=8, pady=8, sticky="w")
@@ -1046,7 +1793,7 @@ class App:
         else:
             doc.font_size = max(8, min(30, doc.font_size + delta))
         doc.font.config(size=doc.font_size)
-        doc.redraw_all()
+        doc.schedule_redraw()
 
     # ---------- Folder sidebar ----------
     def clear_folder(self):
@@ -1060,33 +1807,32 @@ class App:
         self._populate_tree("", folder)
 
     def _populate_tree(self, parent_id, folder_path):
+        # DirEntry.is_dir() is answered from the directory read; no stat() per entry
         try:
-            entries = sorted(Path(folder_path).iterdir(), key=lambda p: (p.is_file(), p.name.lower()))
+            with os.scandir(folder_path) as it:
+                entries = sorted(((e.is_dir(), e) for e in it), key=lambda t: (not t[0], t[1].name.lower()))
         except Exception:
             return
 
-        for p in entries:
-            node = self.tree.insert(parent_id, "end", text=p.name, values=(str(p),))
-            if p.is_dir():
-                self.tree.insert(node, "end", text="(loading...)")
-        self.tree.bind("<<TreeviewOpen>>", self._on_tree_expand)
+        # Folders get one placeholder child (so ttk draws the expand arrow) and are filled in when first opened
+        insert = self.tree.insert
+        for is_dir, e in entries:
+            if is_dir:
+                node = insert(parent_id, "end", text=e.name, values=(e.path,), tags=("dir",))
+                insert(node, "end", text="(loading...)", tags=("placeholder",))
+            else:
+                insert(parent_id, "end", text=e.name, values=(e.path,))
 
     def _on_tree_expand(self, _event):
         item = self.tree.focus()
         if not item:
             return
-        vals = self.tree.item(item, "values")
-        if not vals:
-            return
-        path = vals[0]
-        p = Path(path)
-        if not p.is_dir():
+        if not self.tree.tag_has("dir", item):
             return
-
         kids = self.tree.get_children(item)
-        if len(kids) == 1 and self.tree.item(kids[0], "text") == "(loading...)":
+        if len(kids) == 1 and self.tree.tag_has("placeholder", kids[0]):
             self.tree.delete(kids[0])
-            self._populate_tree(item, str(p))
+            self._populate_tree(item, self.tree.item(item, "values")[0])
 
     def _on_tree_open(self, _event):
         item = self.tree.focus()
@@ -1105,27 +1851,30 @@ class App:
         path = filedialog.asksaveasfilename(defaultextension=".html", filetypes=[("HTML", "*.html")])
         if not path:
             return
-        text = doc.get_text()
-        esc = (
-            text.replace("&", "&amp;")
-                .replace("<", "&lt;")
-                .replace(">", "&gt;")
-        )
-        html = f"""<!doctype html>
+        head = f"""<!doctype html>
 <html>
-<head><meta charset="utf-8"><title>{doc.filepath or "Untitled"}</title>
+<head><meta charset="utf-8"><title>{html.escape(doc.filepath or "Untitled")}</title>
 <style>
 body {{ font-family: monospace; background: #fff; color: #111; }}
 pre {{ white-space: pre-wrap; word-wrap: break-word; }}
 </style></head>
-<body><pre>{esc}</pre></body></html>"""
+<body><pre>"""
         try:
-            safe_write_text(path, html)
+            # Escape leaf by leaf so the whole document is never copied at once
+            with open(path, "w", encoding="utf-8", buffering=WRITE_CHUNK) as f:
+                f.write(head)
+                for chunk in doc.rope.leaves():
+                    f.write(html.escape(chunk, quote=False))
+                f.write("</pre></body></html>")
         except Exception:
             messagebox.showerror("Oops!", "Unable to export HTML.")
 
     def export_pdf(self):
-        if not REPORTLAB_OK:
+        # Optional dependency, imported on demand: it's slow to load at startup
+        try:
+            from reportlab.pdfgen import canvas as rl_canvas
+            from reportlab.lib.pagesizes import letter
+        except ImportError:
             messagebox.showerror("PDF Export", "reportlab not installed; PDF export unavailable.")
             return
         doc = self.current_doc()
@@ -1133,22 +1882,21 @@ pre {{ white-space: pre-wrap; word-wrap: break-word; }}
         if not path:
             return
 
-        lines = doc.get_text().splitlines()
+        lines = [ln[:200] for ln in doc.get_text().splitlines()]
         c = rl_canvas.Canvas(path, pagesize=letter)
         width, height = letter
 
         x = 40
-        y = height - 50
         line_h = 14
+        lines_per_page = int((height - 100) // line_h)
 
-        c.setFont("Courier", 10)
-        for line in lines:
-            if y < 50:
-                c.showPage()
-                c.setFont("Courier", 10)
-                y = height - 50
-            c.drawString(x, y, line[:200])
-            y -= line_h
+        # One text object per page instead of a drawString per line
+        for i in range(0, len(lines) or 1, lines_per_page):
+            t = c.beginText(x, height - 50)
+            t.setFont("Courier", 10, leading=line_h)
+            t.textLines(lines[i:i + lines_per_page], trim=0)
+            c.drawText(t)
+            c.showPage()
 
         try:
             c.save()
@@ -1158,7 +1906,7 @@ pre {{ white-space: pre-wrap; word-wrap: break-word; }}
     # ---------- Autosave + recovery ----------
     def _autosave_tick(self):
         for doc in self.documents:
-            if not doc.dirty:
+            if not doc.dirty or doc.autosaved_at == doc.edit_count:
                 continue
             snapshot = {
                 "time": time.time(),
@@ -1166,23 +1914,38 @@ pre {{ white-space: pre-wrap; word-wrap: break-word; }}
                 "autosave_id": doc.autosave_id,
                 "text": doc.get_text(),
             }
+            # Encode here (cheap); the disk write happens on the writer thread
+            p = self.autosave_dir / f"{doc.autosave_id}.json"
+            self._autosave_q.put((p, json_dumps(snapshot)))
+            doc.autosaved_at = doc.edit_count
+
+        self.root.after(int(self.autosave_seconds * 1000), self._autosave_tick)
+
+    def _autosave_worker(self):
+        while True:
+            p, data = self._autosave_q.get()
             try:
-                p = self.autosave_dir / f"{doc.autosave_id}.json"
-                p.write_text(json.dumps(snapshot), encoding="utf-8")
+                # Write aside then rename, so a crash mid-write can't corrupt recovery
+                tmp = p.with_suffix(".json.tmp")
+                tmp.write_bytes(data)
+                os.replace(tmp, p)
             except Exception:
                 pass
 
-        self.root.after(int(self.autosave_seconds * 1000), self._autosave_tick)
-
     def recover_autosave(self):
-        files = sorted(self.autosave_dir.glob("*.json"), key=lambda p: p.stat().st_mtime, reverse=True)
-        if not files:
+        # Newest snapshot; DirEntry.stat() reuses what scandir already read where it can
+        try:
+            with os.scandir(self.autosave_dir) as it:
+                newest = max((e for e in it if e.name.endswith(".json")), key=lambda e: e.stat().st_mtime, default=None)
+        except OSError:
+            newest = None
+        if newest is None:
             messagebox.showinfo("Recover", "No autosave snapshots found.")
             return
 
-        p = files[0]
+        p = Path(newest.path)
         try:
-            data = json.loads(p.read_text(encoding="utf-8"))
+            data = json_loads(p.read_bytes())
             text = data.get("text", "")
             fp = data.get("filepath", None)
         except Exception:
@@ -1194,7 +1957,7 @@ pre {{ white-space: pre-wrap; word-wrap: break-word; }}
         self.notebook.add(doc.frame, text=self._tab_title(doc) + " (Recovered)")
         self.notebook.select(doc.frame)
 
-        doc.set_dirty(True)
+        doc.forget_saved()
         doc.text.bind("<FocusOut>", lambda e, d=doc: self._focus_lost_save(d), add=True)
 
         self.update_status()
@@ -1228,6 +1991,7 @@ pre {{ white-space: pre-wrap; word-wrap: break-word; }}
     # ---------- Exit ----------
     def exit_app(self):
         for doc in list(self.documents):
+            doc.refresh_dirty()
             if doc.dirty:
                 self.notebook.select(doc.frame)
                 res = messagebox.askyesnocancel("Unsaved changes", f"Save changes to {doc.filepath or 'Untitled'}?")
@@ -1251,18 +2015,35 @@ pre {{ white-space: pre-wrap; word-wrap: break-word; }}
         except Exception:
             pass
 
+    def schedule_status(self):
+        # Coalesce bursts (typing, redraw flushes) into one status rebuild per ~30 ms
+        if self._status_pending:
+            return
+        self._status_pending = True
+        self.root.after(STATUS_DELAY_MS, self._flush_status)
+
+    def _flush_status(self):
+        self._status_pending = False
+        self.update_status()
+
     def update_status(self, extra=""):
         doc = self.current_doc(safe=True)
         if not doc:
+            self._status_key = None
             self.status_var.set(extra)
             return
         idx = doc.text.index("insert")
+        # Auto-repeat and redraw flushes mostly land on an unchanged caret/buffer
+        key = (doc, doc.filepath, doc.dirty, doc.edit_count, idx)
+        if not extra and key == self._status_key:
+            return
+        self._status_key = None if extra else key
         line, col = idx.split(".")
         line = int(line)
         col = int(col) + 1
         name = doc.filepath if doc.filepath else "Untitled"
         state = "Unsaved" if doc.dirty else "Saved"
-        chars = len(doc.get_text())
+        chars = len(doc.rope)  # rope length is cached; no buffer copy per keystroke
         msg = f"{name} | {state} | Ln {line}, Col {col} | {chars} chars"
         if extra:
             msg += f" | {extra}"
@@ -1272,11 +2053,11 @@ pre {{ white-space: pre-wrap; word-wrap: break-word; }}
     def _save_state(self):
         try:
             data = {
-                "recent_files": self.recent_files,
+                "recent_files": list(reversed(self.recent_files)),
                 "autosave_seconds": self.autosave_seconds,
                 "save_on_focus_lost": bool(self.save_on_focus_lost.get()),
             }
-            self.state_file.write_text(json.dumps(data), encoding="utf-8")
+            self.state_file.write_bytes(json_dumps(data))
         except Exception:
             pass
 
@@ -1284,13 +2065,16 @@ pre {{ white-space: pre-wrap; word-wrap: break-word; }}
         if not self.state_file.exists():
             return
         try:
-            data = json.loads(self.state_file.read_text(encoding="utf-8"))
-            self.recent_files = data.get("recent_files", [])[:MAX_RECENT]
+            data = json_loads(self.state_file.read_bytes())
+            recent = data.get("recent_files", [])[:MAX_RECENT]
+            self.recent_files = OrderedDict((p, True) for p in reversed(recent))
             self.autosave_seconds = int(data.get("autosave_seconds", DEFAULT_AUTOSAVE_SECONDS))
             self.save_on_focus_lost.set(bool(data.get("save_on_focus_lost", False)))
-            self._rebuild_recent_menu()
         except Exception:
             pass
+        finally:
+            # add_recent patches the menu in place, so it must match recent_files exactly
+            self._rebuild_recent_menu()
 
 
 def main():